@@ -1,10 +1,22 @@
 from django.db import models
+from multidb_project.replication import content_digest
 
 
 class Customer(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
+    # BLAKE2b digest of the replicated fields, lets sync skip rows a target already has
+    content_hash = models.BinaryField(max_length=16, null=True)
 
     def __str__(self):
         # return f"Customer {self.id} - {self.name} - {self.email}"
         return f"Customer {self.id} - {self.name}"
+
+    def compute_content_hash(self):
+        return content_digest(self.name, self.email)
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "content_hash"}
+        super().save(*args, **kwargs)
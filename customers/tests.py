@@ -1,3 +1,184 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import DatabaseError, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from .models import Customer
+from multidb_project import routers, tasks
+from multidb_project.routers import MultiDBRouter
+
+REPLICAS = ("postgres", "mysql")
+
+
+class ReplicationTargetsTests(SimpleTestCase):
+    def test_targets_exclude_origin(self):
+        self.assertEqual(MultiDBRouter.replication_targets("default"), REPLICAS)
+        self.assertEqual(MultiDBRouter.replication_targets("postgres"), ("default", "mysql"))
+
+    def test_unknown_origin_replicates_everywhere(self):
+        self.assertEqual(MultiDBRouter.replication_targets(None), ("default", *REPLICAS))
+        self.assertEqual(MultiDBRouter.replication_targets("other"), ("default", *REPLICAS))
+
+    def test_refresh_rebinds_the_table(self):
+        previous = routers._replication_targets
+        MultiDBRouter()
+        self.assertIsNot(routers._replication_targets, previous)
+        self.assertEqual(previous[None], ("default", *REPLICAS))  # Not cleared under a concurrent reader
+
+
+@override_settings(CELERY_BROKER_URL=None)  # Run replicate() in-process
+class CustomerReplicationTests(TestCase):
+    databases = "__all__"
+
+    def assertReplicated(self, present=True, **lookup):
+        for alias in REPLICAS:
+            self.assertEqual(Customer.objects.using(alias).filter(**lookup).exists(), present, alias)
+
+    def test_replicates_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = Customer.objects.create(name="Ada", email="ada@example.com")
+            customer.name = "Ada Lovelace"
+            customer.save()
+            self.assertReplicated(present=False, pk=customer.pk)  # Nothing shipped before the commit
+
+        for alias in REPLICAS:
+            replica = Customer.objects.using(alias).get(pk=customer.pk)
+            self.assertEqual(replica.name, "Ada Lovelace")
+            self.assertEqual(bytes(replica.content_hash), customer.compute_content_hash())
+
+    def test_one_flush_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for i in range(3):
+                Customer.objects.create(name=f"Customer {i}", email=f"c{i}@example.com")
+        self.assertEqual(len(callbacks), 1)
+        for alias in REPLICAS:
+            self.assertEqual(Customer.objects.using(alias).count(), 3)
+
+    def test_rollback_is_not_replicated(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Customer.objects.create(name="Ghost", email="ghost@example.com")
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertReplicated(present=False, email="ghost@example.com")
+
+        # The discarded callback must not stop the next transaction from replicating
+        with self.captureOnCommitCallbacks(execute=True):
+            Customer.objects.create(name="Ada", email="ada@example.com")
+        self.assertReplicated(email="ada@example.com")
+        self.assertReplicated(present=False, email="ghost@example.com")  # The pk may be reused, check by email
+
+    def test_failing_target_doesnt_drop_other_batches(self):
+        replicate = tasks.replicate
+
+        def postgres_down(app_label, model_name, pks, source, alias):
+            if alias == "postgres":
+                raise DatabaseError("postgres is down")
+            replicate(app_label, model_name, pks, source, alias)
+
+        with mock.patch.object(tasks, "replicate", side_effect=postgres_down):
+            with self.assertLogs("multidb_project.tasks", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+                customer = Customer.objects.create(name="Ada", email="ada@example.com")
+        self.assertFalse(Customer.objects.using("postgres").filter(pk=customer.pk).exists())
+        self.assertTrue(Customer.objects.using("mysql").filter(pk=customer.pk).exists())
+
+    def test_delete_propagates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = Customer.objects.create(name="Ada", email="ada@example.com")
+        pk = customer.pk
+        self.assertReplicated(pk=pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.delete()
+        self.assertReplicated(present=False, pk=pk)
+
+    def test_bulk_mode_skips_signals(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with MultiDBRouter.bulk_mode():
+                customer = Customer.objects.create(name="Ada", email="ada@example.com")
+                pk = customer.pk
+                customer.delete()
+                Customer.objects.create(name="Grace", email="grace@example.com")
+        self.assertEqual(callbacks, [])
+        self.assertReplicated(present=False, pk=pk)
+        self.assertReplicated(present=False, email="grace@example.com")
+        self.assertFalse(MultiDBRouter.in_bulk_mode())  # Restored on exit
+
+
+class SyncCommandTests(TransactionTestCase):
+    """
+    sync and compare run each target in a worker thread, which can't see
+    TestCase's uncommitted rows, so these tests commit for real.
+    """
+    databases = "__all__"
+
+    def setUp(self):
+        with MultiDBRouter.bulk_mode():  # Only in default, sync has to copy them
+            Customer.objects.bulk_create(
+                Customer(name=f"Customer {i}", email=f"c{i}@example.com") for i in range(5)
+            )
+
+    def multidb(self, *args):
+        out = StringIO()
+        call_command("multidb", *args, stdout=out)
+        return out.getvalue()
+
+    def test_sync_copies_then_skips_unchanged(self):
+        out = self.multidb("sync", "--models", "customers.Customer")
+        self.assertIn("Synced customers.Customer: 5 rows (0 unchanged)", out)
+        for alias in REPLICAS:
+            self.assertEqual(Customer.objects.using(alias).count(), 5)
+
+        out = self.multidb("sync", "--models", "customers.Customer")
+        self.assertIn("Synced customers.Customer: 0 rows (5 unchanged)", out)
+
+    def test_sync_resends_changed_rows(self):
+        self.multidb("sync", "--models", "customers.Customer")
+        first, second = Customer.objects.using("default").order_by("pk")[:2]
+        # QuerySet.update skips save(): the source's digest is stale, sync recomputes it
+        Customer.objects.using("default").filter(pk=first.pk).update(name="Renamed")
+        # A replica row without a digest is sent again
+        Customer.objects.using("postgres").filter(pk=second.pk).update(content_hash=None)
+
+        out = self.multidb("sync", "--models", "customers.Customer")
+        self.assertEqual(out.count("Synced customers.Customer: 2 rows (3 unchanged)"), 1)  # postgres
+        self.assertEqual(out.count("Synced customers.Customer: 1 rows (4 unchanged)"), 1)  # mysql
+        for alias in REPLICAS:
+            replica = Customer.objects.using(alias).get(pk=first.pk)
+            self.assertEqual(replica.name, "Renamed")
+            self.assertEqual(bytes(replica.content_hash), replica.compute_content_hash())
+
+    def test_command_keeps_callers_connections(self):
+        closed_in = []
+        close_all = connections.close_all
+
+        def record():
+            closed_in.append(threading.current_thread())
+            close_all()
+
+        with mock.patch.object(connections, "close_all", side_effect=record), transaction.atomic():
+            Customer.objects.create(name="Ada", email="ada@example.com")
+            self.multidb("status")
+            self.assertTrue(connections["default"].in_atomic_block)
+        self.assertTrue(Customer.objects.using("default").filter(email="ada@example.com").exists())
+        # Only the per-alias worker threads close their connections
+        self.assertEqual(len(closed_in), len(connections.settings))
+        self.assertNotIn(threading.current_thread(), closed_in)
+
+    def test_compare_repairs_missing_rows(self):
+        self.multidb("sync", "--models", "customers.Customer")
+        pks = list(Customer.objects.using("mysql").order_by("pk").values_list("pk", flat=True)[:2])
+        with MultiDBRouter.bulk_mode():  # Lose them on the replica only
+            Customer.objects.using("mysql").filter(pk__in=pks).delete()
+
+        out = self.multidb("compare", "--repair")
+        self.assertIn("Customer mismatch", out)
+        self.assertIn("rows synced: {'postgres': 0, 'mysql': 2}", out)  # Counted while syncing
+        for alias in REPLICAS:
+            self.assertEqual(Customer.objects.using(alias).count(), 5)
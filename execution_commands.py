@@ -35,8 +35,10 @@ django.setup()
 # Now safe to import models
 
 from django.conf import settings
+from django.core.management import call_command
 from customers.models import Customer
 from orders.models import Order
+from multidb_project.routers import MultiDBRouter
 
 h_line = "-" * 50
 
@@ -55,21 +57,24 @@ customers_data = [
 ]
 
 products_data = [
-    # {"product": "Desktop", "amount": 150000.00},
-    {"product": "Laptop", "amount": 120000.00},
-    {"product": "Mobile", "amount": 90000.00},
-    # {"product": "Table", "amount": 20000.00},
-    # {"product": "Chair", "amount": 15000.00},
+    # {"product": "Desktop", "amount_cents": 15000000},
+    {"product": "Laptop", "amount_cents": 12000000},
+    {"product": "Mobile", "amount_cents": 9000000},
+    # {"product": "Table", "amount_cents": 2000000},
+    # {"product": "Chair", "amount_cents": 1500000},
 ]
 
 print()
-for data in customers_data:  # Create a customer (will replicate)
-    c, _ = Customer.objects.get_or_create(name=data["name"], email=data["email"])
+with MultiDBRouter.bulk_mode():  # Skip per-row replication, sync everything in bulk below
+    for data in customers_data:  # Create a customer
+        c, _ = Customer.objects.get_or_create(name=data["name"], email=data["email"])
 
-    for p in products_data:  # Create a order (will replicate)
-        Order.objects.get_or_create(customer=c, product=p["product"], amount=p["amount"])
+        for p in products_data:  # Create a order
+            Order.objects.get_or_create(customer=c, product=p["product"], amount_cents=p["amount_cents"])
 
-    print(h_line)
+        print(h_line)
+
+call_command("multidb", "sync")  # Replicate default → others with one bulk upsert per DB
 
 print()
 for n in range(5):  # Fetch from different DBs
@@ -0,0 +1,6 @@
+try:
+    from .celery import app as celery_app
+except ImportError:  # Celery is optional, replication runs in-process without it
+    celery_app = None
+
+__all__ = ("celery_app",)
@@ -0,0 +1,16 @@
+"""
+Celery app for asynchronous replication.
+
+Start a worker with:
+celery -A multidb_project worker -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'multidb_project.settings')
+
+app = Celery("multidb_project")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
@@ -3,8 +3,14 @@ from django.core.management.base import BaseCommand, CommandError
 from django.core.management import call_command
 from django.conf import settings
 from django.apps import apps
-from django.db import connections
+from django.db import connections, transaction
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from graphlib import CycleError, TopologicalSorter
+from itertools import islice
+from multidb_project.replication import bulk_upsert
 import os
+import threading
 
 """
 python manage.py multidb migrate     # migrate all DBs
@@ -16,6 +22,50 @@ python manage.py multidb status      # check tables + row counts
 python manage.py multidb compare     # compare row counts
 """
 
+SYNC_CHUNK_SIZE = 2000  # Rows streamed from the source DB per bulk upsert
+
+_stdout_lock = threading.Lock()
+
+_TABLE_COUNT_SQL = {
+    "sqlite": "SELECT count(*) FROM sqlite_master WHERE type = 'table'",
+    "postgresql": "SELECT count(*) FROM information_schema.tables WHERE table_schema = 'public'",
+    "mysql": "SELECT count(*) FROM information_schema.tables WHERE table_schema = DATABASE()",
+}
+
+
+def _chunked(iterable, size):
+    """Yield lists of up to size items from iterable."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@lru_cache(maxsize=None)
+def _foreign_keys(model):
+    """(attname, related model) for each FK of model."""
+    return tuple((f.attname, f.related_model) for f in model._meta.local_fields if f.many_to_one and f.related_model)
+
+
+def _dependency_order(models):
+    """Sort models so every model comes after the models its FKs point to."""
+    models = list(models)
+    graph = {m: {related for _, related in _foreign_keys(m) if related is not m and related in models} for m in models}
+    return list(TopologicalSorter(graph).static_order())
+
+
+def _run_per_alias(func, aliases):
+    """Run func(alias) for all aliases concurrently, returning results in alias order."""
+    def run(alias):
+        try:
+            return func(alias)
+        finally:
+            connections.close_all()  # Connections are per thread, don't leak the worker's
+
+    if not aliases:
+        return []
+    with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+        return list(executor.map(run, aliases))
+
 
 class Command(BaseCommand):
     help = "Multi-database management (migrate, sync, flush, dump, load, status, compare)"
@@ -117,71 +167,96 @@ class Command(BaseCommand):
         models_filter = set(models_filter.split(",")) if models_filter else None
         exclude_filter = set(exclude_filter.split(",")) if exclude_filter else set()
 
-        # Replication order: ensure dependencies first
-        model_order = []
-        customer_model = apps.get_model("customers", "Customer")
-        order_model = apps.get_model("orders", "Order")
-        if customer_model in apps.get_models():
-            model_order.append(customer_model)
-        for m in apps.get_models():
-            if m not in model_order:
-                model_order.append(m)
+        # Replication order: FK targets before the models using them
+        try:
+            model_order = _dependency_order(apps.get_models())
+            ordered = True
+        except CycleError:  # e.g. two models with FKs to each other, rely on the per-chunk FK upserts
+            model_order = apps.get_models()
+            ordered = False
 
-        for alias in settings.DATABASES.keys():
-            if alias == default_alias:
-                continue
-            self.stdout.write(self.style.WARNING(f"Syncing data into {alias}..."))
-
-            for model in model_order:
-                app_label = model._meta.app_label
-                model_name = f"{app_label}.{model.__name__}"
+        selected = []
+        for model in model_order:
+            app_label = model._meta.app_label
+            model_name = f"{app_label}.{model.__name__}"
 
-                if app_label in skip_apps:  # 🚫 Skip Django system apps
-                    continue
-                if app_label in exclude_filter or model_name in exclude_filter:  # 🚫 Skip excluded apps or models
-                    self.stdout.write(self.style.NOTICE(f"Skipping {model_name}"))
-                    continue
-                if apps_filter and app_label not in apps_filter:  # ✅ Apply include filters
-                    continue
-                if models_filter and model_name not in models_filter:
-                    continue
-
-                objs = model.objects.using(default_alias).all() # Get all objects from default DB
-                if not objs:
-                    continue
-
-                # Handle dependencies: ensure Customer exists before Order
-                if model_name == "orders.Order":
-                    customer_objs = {c.pk: c for c in customer_model.objects.using(default_alias).all()}
-
-                for obj in objs:
-                    row = {
-                        f.attname if f.get_internal_type() == "ForeignKey" else f.name: getattr(obj, f.attname)
-                        if f.get_internal_type() == "ForeignKey" else getattr(obj, f.name)
-                        for f in model._meta.local_fields
-                    }
-
-                    if model_name == "orders.Order":  # Replicate Customer dependency for Orders
-                        customer = customer_objs.get(row["customer_id"])
-                        if customer:
-                            try:
-                                router.start_replication(alias)
-                                customer_model.objects.using(alias).update_or_create(
-                                    pk=customer.pk,
-                                    defaults={"name": customer.name, "email": customer.email},
-                                )
-                            finally:
-                                router.stop_replication(alias)
-
-                    try:  # Replicate main object
-                        router.start_replication(alias)
-                        model.objects.using(alias).update_or_create(pk=row["id"], defaults=row)
-                    finally:
-                        router.stop_replication(alias)
-
-                self.stdout.write(f"  Synced {model_name}: {objs.count()} rows")
-
-            self.stdout.write(self.style.SUCCESS(f"✔ Finished syncing {alias}"))
+            if app_label in skip_apps:  # 🚫 Skip Django system apps
+                continue
+            if app_label in exclude_filter or model_name in exclude_filter:  # 🚫 Skip excluded apps or models
+                self.stdout.write(self.style.NOTICE(f"Skipping {model_name}"))
+                continue
+            if apps_filter and app_label not in apps_filter:  # ✅ Apply include filters
+                continue
+            if models_filter and model_name not in models_filter:
+                continue
+            selected.append(model)
+
+        # Targets are independent, sync them in parallel
+        targets = [alias for alias in settings.DATABASES.keys() if alias != default_alias]
+        _run_per_alias(lambda alias: self._sync_one(alias, selected, default_alias, router, ordered), targets)
+
+    def _sync_one(self, alias, models, default_alias, router, ordered=True):
+        self._write(self.style.WARNING(f"Syncing data into {alias}..."))
+        lines = []  # Written as one block so parallel targets don't interleave
+        try:
+            router.start_replication(alias)
+            with transaction.atomic(using=alias):  # One commit per target DB
+                done = set()
+                for model in models:
+                    synced, unchanged = self._sync_model(model, default_alias, alias, done=done)
+                    if ordered:  # Without a dependency order, always upsert FK targets per chunk
+                        done.add(model)
+                    if synced or unchanged:
+                        lines.append(f"  Synced {model._meta.label}: {synced} rows ({unchanged} unchanged)")
+        finally:
+            router.stop_replication(alias)
+
+        self._write(*lines, self.style.SUCCESS(f"✔ Finished syncing {alias}"))
+
+    def _write(self, *lines):
+        with _stdout_lock:
+            for line in lines:
+                self.stdout.write(line)
+
+    def _sync_model(self, model, source, alias, done=()):
+        """
+        Upsert model's rows from source into alias, streaming SYNC_CHUNK_SIZE rows at a time.
+        Rows a chunk references in models not already synced (done) are upserted first.
+        Returns (synced, unchanged) row counts.
+        """
+        dependencies = [(attname, related) for attname, related in _foreign_keys(model) if related not in done]
+        synced = unchanged = 0
+        rows = model.objects.using(source).iterator(chunk_size=SYNC_CHUNK_SIZE)
+        for chunk in _chunked(rows, SYNC_CHUNK_SIZE):
+            # Handle dependencies: ensure this chunk's referenced rows (e.g. Customers of Orders) exist
+            for attname, related_model in dependencies:
+                related = related_model.objects.using(source).in_bulk({getattr(o, attname) for o in chunk} - {None})
+                bulk_upsert(related_model, alias, self._changed_objs(related_model, alias, list(related.values())))
+
+            changed = self._changed_objs(model, alias, chunk)
+            bulk_upsert(model, alias, changed)  # Replicate main objects
+            synced += len(changed)
+            unchanged += len(chunk) - len(changed)
+        return synced, unchanged
+
+    @staticmethod
+    def _changed_objs(model, alias, objs):
+        """
+        Return the objs that are missing in alias or whose content_hash differs there.
+        Only the target's stored digests are fetched, not its rows. A replica row changed
+        without save() (QuerySet.update, raw SQL) keeps its old digest and is not detected.
+        """
+        if not hasattr(model, "compute_content_hash"):
+            return objs
+        theirs = dict(
+            model.objects.using(alias).filter(pk__in=[obj.pk for obj in objs]).values_list("pk", "content_hash")
+        )
+        changed = []
+        for obj in objs:
+            obj.content_hash = obj.compute_content_hash()  # The source's stored digest may be stale, and is sent along
+            if theirs.get(obj.pk) != obj.content_hash:  # memoryview on PostgreSQL compares equal to bytes
+                changed.append(obj)
+        return changed
 
     def _flush_all(self, noinput=False):
         for alias in settings.DATABASES.keys():
@@ -193,44 +268,89 @@ class Command(BaseCommand):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        for alias in settings.DATABASES.keys():
+        def dump(alias):
             filename = os.path.join(output_dir, f"{alias}.json")
-            self.stdout.write(self.style.WARNING(f"Dumping {alias} into {filename}..."))
+            self._write(self.style.WARNING(f"Dumping {alias} into {filename}..."))
             with open(filename, "w", encoding="utf-8") as f:
                 call_command("dumpdata", database=alias, indent=2, stdout=f)
-            self.stdout.write(self.style.SUCCESS(f"✔ Dumped {alias}"))
+            self._write(self.style.SUCCESS(f"✔ Dumped {alias}"))
+
+        _run_per_alias(dump, list(settings.DATABASES.keys()))
 
     def _load_all(self, input_dir):
-        for alias in settings.DATABASES.keys():
+        from multidb_project.routers import MultiDBRouter
+
+        def load(alias):
             filename = os.path.join(input_dir, f"{alias}.json")
             if not os.path.exists(filename):
-                self.stdout.write(self.style.ERROR(f"❌ No fixture for {alias} at {filename}"))
-                continue
-            self.stdout.write(self.style.WARNING(f"Loading {alias} from {filename}..."))
-            call_command("loaddata", filename, database=alias)
-            self.stdout.write(self.style.SUCCESS(f"✔ Loaded {alias}"))
+                self._write(self.style.ERROR(f"❌ No fixture for {alias} at {filename}"))
+                return
+            self._write(self.style.WARNING(f"Loading {alias} from {filename}..."))
+            with MultiDBRouter.bulk_mode():  # Each DB has its own fixture, don't replicate per row
+                call_command("loaddata", filename, database=alias)
+            self._write(self.style.SUCCESS(f"✔ Loaded {alias}"))
+
+        _run_per_alias(load, list(settings.DATABASES.keys()))
 
     def _status_all(self):
         """Check table and row counts per DB"""
-        for alias in settings.DATABASES.keys():
+        dbs = list(settings.DATABASES.keys())
+        models = apps.get_models()
+        results = _run_per_alias(lambda alias: (self._count_tables(alias), self._count_rows(alias, models)), dbs)
+
+        for alias, (table_count, counts) in zip(dbs, results):
             self.stdout.write(self.style.MIGRATE_HEADING(f"\n📊 Status for {alias}"))
-            connection = connections[alias]
-            try:
-                with connection.cursor() as cursor:
-                    cursor.execute("SELECT count(*) FROM sqlite_master" if "sqlite" in connection.vendor else "SELECT count(*) FROM information_schema.tables WHERE table_schema = 'public'" if connection.vendor == "postgresql" else "SELECT count(*) FROM information_schema.tables WHERE table_schema = DATABASE()")
-                    table_count = cursor.fetchone()[0]
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Could not fetch table count: {e}"))
+            if isinstance(table_count, Exception):
+                self.stdout.write(self.style.ERROR(f"❌ Could not fetch table count: {table_count}"))
                 table_count = 0
 
             self.stdout.write(self.style.WARNING(f"Tables: {table_count}"))
 
-            for model in apps.get_models():
-                try:
-                    count = model.objects.using(alias).count()
+            for model in models:
+                count = counts[model]
+                if isinstance(count, Exception):
+                    self.stdout.write(self.style.ERROR(f"  {model.__name__}: ❌ {count}"))
+                else:
                     self.stdout.write(f"  {model.__name__}: {count}")
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"  {model.__name__}: ❌ {e}"))
+
+    @staticmethod
+    def _count_tables(alias):
+        """Number of tables in alias, or the exception raised while counting."""
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                sql = _TABLE_COUNT_SQL.get(connection.vendor)
+                if sql is None:
+                    raise CommandError(f"Table count not supported for {connection.vendor}")
+                cursor.execute(sql)
+                return cursor.fetchone()[0]
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def _count_rows(alias, models):
+        """
+        Row count per model in alias, fetched with a single SELECT of COUNT(*) subqueries.
+        Falls back to one query per model if that fails (e.g. a missing table), in which case
+        a failing model maps to its exception instead of a count.
+        """
+        connection = connections[alias]
+        qn = connection.ops.quote_name
+        sql = "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {qn(m._meta.db_table)})" for m in models)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                return dict(zip(models, cursor.fetchone()))
+        except Exception:
+            pass
+
+        counts = {}
+        for model in models:
+            try:
+                counts[model] = model.objects.using(alias).count()
+            except Exception as e:
+                counts[model] = e
+        return counts
 
     def _compare_all(self, repair=False, interactive=False, dry_run=False):
         """Compare row counts across DBs, optionally repair mismatches"""
@@ -242,13 +362,14 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.MIGRATE_HEADING("\n🔍 Comparing databases..."))
 
-        for model in apps.get_models():
+        models = apps.get_models()
+        all_counts = dict(zip(dbs, _run_per_alias(lambda alias: self._count_rows(alias, models), dbs)))
+
+        for model in models:
             counts = {}
             for alias in dbs:
-                try:
-                    counts[alias] = model.objects.using(alias).count()
-                except Exception:
-                    counts[alias] = None
+                count = all_counts[alias][model]
+                counts[alias] = None if isinstance(count, Exception) else count
 
             if len(set(counts.values())) == 1:
                 self.stdout.write(self.style.SUCCESS(f"✔ {model.__name__} counts match: {counts}"))
@@ -271,40 +392,17 @@ class Command(BaseCommand):
                     continue
 
                 try:
-                    objs = model.objects.using(default_alias).all()
-
-                    # Ensure dependencies first
-                    if model._meta.model_name == "order":
-                        customer_model = apps.get_model("customers", "Customer")
-                        customer_objs = {c.pk: c for c in customer_model.objects.using(default_alias).all()}
-
-                    for obj in objs:
-                        data = {
-                            f.name: getattr(obj, f.attname) if f.get_internal_type() == "ForeignKey" else getattr(obj, f.name)
-                            for f in model._meta.fields if f.name != "id"
-                        }
-
-                        if model._meta.model_name == "order":
-                            customer = customer_objs.get(data["customer_id"])
-                            if customer:
-                                try:
-                                    router.start_replication(alias)
-                                    customer_model.objects.using(alias).update_or_create(
-                                        pk=customer.pk,
-                                        defaults={"name": customer.name, "email": customer.email},
-                                    )
-                                finally:
-                                    router.stop_replication(alias)
-
-                        for alias in dbs:
-                            if alias == default_alias:
-                                continue
-                            try:
-                                router.start_replication(alias)
-                                model.objects.using(alias).update_or_create(pk=obj.pk, defaults=data)
-                            finally:
-                                router.stop_replication(alias)
-
-                    self.stdout.write(self.style.SUCCESS(f"✔ {model.__name__} repaired"))
+                    synced = {}  # Counted while syncing, no extra COUNT(*) afterwards
+                    for alias in dbs:
+                        if alias == default_alias:
+                            continue
+                        try:
+                            router.start_replication(alias)
+                            with transaction.atomic(using=alias):  # One commit per target DB
+                                synced[alias], _ = self._sync_model(model, default_alias, alias)
+                        finally:
+                            router.stop_replication(alias)
+
+                    self.stdout.write(self.style.SUCCESS(f"✔ {model.__name__} repaired, rows synced: {synced}"))
                 except Exception as e:
                     self.stdout.write(self.style.ERROR(f"❌ Failed to repair {model.__name__}: {e}"))
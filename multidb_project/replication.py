@@ -0,0 +1,58 @@
+# multidb_project/replication.py
+"""Write primitives shared by the multidb command and the replication tasks."""
+import hashlib
+from functools import lru_cache
+from django.db import connections
+from multidb_project.routers import MultiDBRouter
+
+
+def content_digest(*values):
+    """
+    16-byte BLAKE2b of values. Each value is length-prefixed (None gets its own marker),
+    so different value tuples never share an encoding even if they contain the separator.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        if value is None:
+            digest.update(b"\x00")
+            continue
+        data = str(value).encode()
+        digest.update(b"\x01" + len(data).to_bytes(8, "big") + data)
+    return digest.digest()
+
+
+@lru_cache(maxsize=None)
+def value_attnames(model):
+    """Non-pk column attnames (FKs as <name>_id), walked once per model instead of per row."""
+    return tuple(f.attname for f in model._meta.local_fields if not f.primary_key)
+
+
+def bulk_upsert(model, alias, objs, batch_size=1000):
+    """
+    Insert or update objs in alias with batched INSERT ... ON CONFLICT DO UPDATE.
+    Backends without update_conflicts support (e.g. Oracle) fall back to update_or_create per row.
+    """
+    if not objs:
+        return
+    features = connections[alias].features
+    attnames = value_attnames(model)
+
+    if not features.supports_update_conflicts:
+        with MultiDBRouter.bulk_mode():  # Like bulk_create, don't fire per-row replication
+            for obj in objs:
+                model.objects.using(alias).update_or_create(
+                    pk=obj.pk, defaults={attname: getattr(obj, attname) for attname in attnames}
+                )
+        return
+
+    # MySQL upserts on any unique key (ON DUPLICATE KEY UPDATE) and rejects an explicit target.
+    # So a target row sharing another unique value (e.g. Customer.email) under a different pk
+    # is silently overwritten there, where update_or_create would raise IntegrityError.
+    unique_fields = [model._meta.pk.name] if features.supports_update_conflicts_with_target else None
+    model.objects.using(alias).bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        update_fields=attnames,
+        unique_fields=unique_fields,
+    )
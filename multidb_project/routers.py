@@ -1,11 +1,22 @@
 # multidb_project/routers.py
 import itertools
+import logging
+import sys
+from contextlib import contextmanager
 from django.conf import settings
 import threading
 
+logger = logging.getLogger(__name__)
+
+# next() on itertools.count() is atomic under the GIL; free-threaded builds need a lock
+_GIL_DISABLED = not getattr(sys, "_is_gil_enabled", lambda: True)()
+
 # Thread-local storage for replication state
 _replication_state = threading.local()
 
+# Replication targets per origin DB, rebuilt by MultiDBRouter.refresh()
+_replication_targets = {None: ()}
+
 
 class MultiDBRouter:
     """
@@ -30,6 +41,35 @@ class MultiDBRouter:
             and alias in _replication_state.replicating
         )
 
+    @staticmethod
+    def replication_targets(origin):
+        """
+        Aliases a write on origin replicates to: empty with a single DB,
+        all of them for None or an alias not in DATABASES.
+        """
+        targets = _replication_targets  # One read, refresh() may rebind it meanwhile
+        return targets.get(origin, targets[None])
+
+    @staticmethod
+    @contextmanager
+    def bulk_mode():
+        """
+        Suspend per-row post_save/post_delete replication for the current thread.
+        The caller is responsible for replicating afterwards in bulk (e.g. `multidb sync`,
+        which does not propagate deletes). Signal receivers must check in_bulk_mode() first,
+        before looping over DATABASES.
+        """
+        previous = getattr(_replication_state, "bulk", False)
+        _replication_state.bulk = True
+        try:
+            yield
+        finally:
+            _replication_state.bulk = previous
+
+    @staticmethod
+    def in_bulk_mode():
+        return getattr(_replication_state, "bulk", False)
+
     """
     A database router that:
       - Routes all writes to default unless specified
@@ -39,23 +79,38 @@ class MultiDBRouter:
     """
 
     def __init__(self):
-        # Round-robin iterator over available DBs
-        self.read_dbs = list(settings.DATABASES.keys())
-        self.read_cycle = itertools.cycle(self.read_dbs)
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the configured databases (e.g. after settings.DATABASES is changed in tests)."""
+        # Round-robin counter over available DBs
+        self.read_dbs = tuple(settings.DATABASES)
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+        # Precomputed so signal receivers don't filter out the origin on every write
+        targets = {alias: tuple(a for a in self.read_dbs if a != alias) for alias in self.read_dbs}
+        targets[None] = self.read_dbs
+        global _replication_targets
+        _replication_targets = targets  # Rebound, never mutated: receivers in other threads see old or new
 
     def db_for_read(self, model, **hints):
         """Point all reads to Round-robin between all unless specified."""
         if hints.get("database"):
             return hints["database"]
         """Round-robin between all databases for reads."""
-        db = next(self.read_cycle)
-        print(f"[Router] Read from {db} for {model.__name__}")
+        if _GIL_DISABLED:
+            with self._lock:
+                n = next(self._rr)
+        else:
+            n = next(self._rr)
+        db = self.read_dbs[n % len(self.read_dbs)]
+        logger.debug("Read from %s for %s", db, model.__name__)
         return db
 
     def db_for_write(self, model, **hints):
         """Point all writes to default unless specified."""
         db = hints.get("database", "default")
-        print(f"[Router] Write to {db} for {model.__name__}")
+        logger.debug("Write to %s for %s", db, model.__name__)
         return db
 
     def allow_relation(self, obj1, obj2, **hints):
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -87,6 +88,8 @@ DATABASES = {
         "PASSWORD": "postgres",
         "HOST": "localhost",
         "PORT": "5432",
+        "CONN_MAX_AGE": 600,  # Reuse the connection across replication writes
+        "CONN_HEALTH_CHECKS": True,
     },
     "mysql": {
         "ENGINE": "django.db.backends.mysql",
@@ -95,10 +98,20 @@ DATABASES = {
         "PASSWORD": "root",
         "HOST": "localhost",
         "PORT": "3306",
+        "CONN_MAX_AGE": 600,  # Reuse the connection across replication writes
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "compress": True,  # zlib-compress the client/server protocol, worth it for a remote replica
+        },
     },
 }
 DATABASE_ROUTERS = ["multidb_project.routers.MultiDBRouter"]
 
+# Replication tasks go to Celery when a broker is set (e.g. redis://localhost:6379/0),
+# otherwise they run in-process right after the originating transaction commits
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL")
+CELERY_TASK_ACKS_LATE = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,111 @@
+# multidb_project/tasks.py
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache, partial
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from multidb_project import celery_app
+from multidb_project.replication import bulk_upsert
+from multidb_project.routers import MultiDBRouter
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+logger = logging.getLogger(__name__)
+
+router = MultiDBRouter()
+
+# Thread-local so a flush only ships writes from transactions this thread committed
+_queue = threading.local()
+
+
+@lru_cache(maxsize=None)
+def _fk_names(model):
+    return tuple(f.name for f in model._meta.local_fields if f.many_to_one)
+
+
+def replicate_dependencies(objs, alias):
+    """
+    Upsert the rows objs point to (e.g. the Orders' Customers) into the target DB.
+    One INSERT ... ON CONFLICT per relation instead of an exists() check plus update_or_create.
+    """
+    for name in _fk_names(type(objs[0])):
+        related = {r.pk: r for r in (getattr(obj, name) for obj in objs) if r is not None}  # select_related
+        if related:
+            bulk_upsert(type(next(iter(related.values()))), alias, list(related.values()))
+
+
+def replicate(app_label, model_name, pks, source, alias):
+    """
+    Make alias match source for pks: rows still in source are upserted (FK targets first),
+    rows gone from source are deleted. Rows are re-read from source, so a batch queued
+    before later writes (or a rolled-back delete) still converges to the committed state.
+    """
+    model = apps.get_model(app_label, model_name)
+    try:
+        router.start_replication(alias)
+        # Our own writes must not fan out again; commit the whole batch at once
+        with router.bulk_mode(), transaction.atomic(using=alias):
+            objs = list(model.objects.using(source).select_related(*_fk_names(model)).filter(pk__in=pks))
+            if objs:
+                replicate_dependencies(objs, alias)
+                bulk_upsert(model, alias, objs)
+
+            gone = set(pks) - {obj.pk for obj in objs}
+            if gone:
+                model.objects.using(alias).filter(pk__in=gone).delete()
+    finally:
+        router.stop_replication(alias)
+
+
+if shared_task is not None:
+    replicate = shared_task(replicate)
+
+
+def dispatch(*args):
+    """Queue replicate() on Celery when a broker is configured, otherwise run it in-process."""
+    if celery_app is not None and settings.CELERY_BROKER_URL:
+        replicate.delay(*args)
+    else:
+        replicate(*args)
+
+
+def enqueue(source, alias, model_label, pk):
+    """
+    Mark a row written in source for replication into alias.
+    Rows queued during a transaction on source are shipped together by flush_pending(source)
+    once that transaction commits.
+    """
+    if not hasattr(_queue, "pending"):
+        _queue.pending = defaultdict(lambda: defaultdict(set))
+        _queue.registered = {}
+    _queue.pending[source][(alias, model_label)].add(pk)
+
+    # One on_commit callback per transaction. A rollback discards it without telling us,
+    # so check it is still queued on the connection before relying on it.
+    callback = _queue.registered.get(source)
+    if callback is None or not any(entry[1] is callback for entry in connections[source].run_on_commit):
+        callback = _queue.registered[source] = partial(flush_pending, source)
+        transaction.on_commit(callback, using=source)
+
+
+def flush_pending(source):
+    """
+    Dispatch one replicate() batch per (alias, model) queued for source on this thread.
+    Runs after source has committed, so a failing batch is logged rather than raised
+    and doesn't stop the other batches.
+    """
+    _queue.registered.pop(source, None)
+    pending = _queue.pending.pop(source, None)  # Take it first, replicate() may enqueue again
+    if not pending:
+        return
+    for (alias, model_label), pks in pending.items():
+        app_label, model_name = model_label.split(".")
+        try:
+            dispatch(app_label, model_name, sorted(pks), source, alias)
+        except Exception:
+            logger.exception("Replicating %s %s from %s into %s failed", model_label, sorted(pks), source, alias)
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-14 03:52
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def _digest(*values):
+    """Same encoding as multidb_project.replication.content_digest, frozen for this migration."""
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        if value is None:
+            digest.update(b"\x00")
+            continue
+        data = str(value).encode()
+        digest.update(b"\x01" + len(data).to_bytes(8, "big") + data)
+    return digest.digest()
+
+
+def backfill_content_hash(apps, schema_editor):
+    Order = apps.get_model("orders", "Order")
+    db = schema_editor.connection.alias
+    orders = list(Order.objects.using(db).all())
+    for o in orders:
+        o.content_hash = _digest(o.customer_id, o.product, f"{o.amount:.2f}")
+    Order.objects.using(db).bulk_update(orders, ["content_hash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='content_hash',
+            field=models.BinaryField(max_length=16, null=True),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-14 05:10
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def _digest(*values):
+    """Same encoding as multidb_project.replication.content_digest, frozen for this migration."""
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        if value is None:
+            digest.update(b"\x00")
+            continue
+        data = str(value).encode()
+        digest.update(b"\x01" + len(data).to_bytes(8, "big") + data)
+    return digest.digest()
+
+
+def amount_to_cents(apps, schema_editor):
+    Order = apps.get_model("orders", "Order")
+    db = schema_editor.connection.alias
+    orders = list(Order.objects.using(db).all())
+    for o in orders:
+        o.amount_cents = int((o.amount * 100).to_integral_value())
+        o.content_hash = _digest(o.customer_id, o.product, o.amount_cents)  # Order.compute_content_hash
+    Order.objects.using(db).bulk_update(orders, ["amount_cents", "content_hash"], batch_size=1000)
+
+
+def cents_to_amount(apps, schema_editor):
+    Order = apps.get_model("orders", "Order")
+    db = schema_editor.connection.alias
+    orders = list(Order.objects.using(db).all())
+    for o in orders:
+        o.amount = Decimal(o.amount_cents).scaleb(-2)
+        o.content_hash = _digest(o.customer_id, o.product, f"{o.amount:.2f}")
+    Order.objects.using(db).bulk_update(orders, ["amount", "content_hash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='amount_cents',
+            field=models.PositiveBigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(amount_to_cents, cents_to_amount),
+        migrations.RemoveField(
+            model_name='order',
+            name='amount',
+        ),
+    ]
@@ -1,11 +1,29 @@
+from decimal import Decimal
+
 from django.db import models
 from customers.models import Customer
+from multidb_project.replication import content_digest
 
 
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
     product = models.CharField(max_length=100)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    amount_cents = models.PositiveBigIntegerField()  # Integer cents, cheaper than Decimal to save, hash and replicate
+    # Digest of the replicated fields, see Customer.content_hash
+    content_hash = models.BinaryField(max_length=16, null=True)
 
     def __str__(self):
-        return f"Order {self.id} - {self.product} - {self.amount} for Customer {self.customer.id}"
+        return f"Order {self.id} - {self.product} - {self.amount_decimal} for Customer {self.customer.id}"
+
+    @property
+    def amount_decimal(self):
+        return Decimal(self.amount_cents).scaleb(-2)
+
+    def compute_content_hash(self):
+        return content_digest(self.customer_id, self.product, self.amount_cents)
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "content_hash"}
+        super().save(*args, **kwargs)
@@ -1,3 +1,155 @@
-from django.test import TestCase
+from decimal import Decimal
+from graphlib import CycleError
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, models
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import isolate_apps
+
+from .models import Order
+from customers.models import Customer
+from multidb_project.management.commands import multidb
+from multidb_project.replication import content_digest
+from multidb_project.routers import MultiDBRouter
+
+REPLICAS = ("postgres", "mysql")
+
+
+@override_settings(CELERY_BROKER_URL=None)  # Run replicate() in-process
+class OrderReplicationTests(TestCase):
+    databases = "__all__"
+
+    def test_replicates_with_its_customer(self):
+        with MultiDBRouter.bulk_mode():  # Customer exists in default only
+            customer = Customer.objects.create(name="Ada", email="ada@example.com")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=customer, product="Laptop", amount_cents=123456)
+
+        for alias in REPLICAS:
+            replica = Order.objects.using(alias).select_related("customer").get(pk=order.pk)
+            self.assertEqual(replica.customer.email, "ada@example.com")
+            self.assertEqual(replica.amount_decimal, Decimal("1234.56"))
+
+    def test_delete_propagates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = Customer.objects.create(name="Ada", email="ada@example.com")
+            order = Order.objects.create(customer=customer, product="Laptop", amount_cents=100)
+        pk = order.pk
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        for alias in REPLICAS:
+            self.assertFalse(Order.objects.using(alias).filter(pk=pk).exists(), alias)
+            self.assertTrue(Customer.objects.using(alias).filter(pk=customer.pk).exists(), alias)
+
+
+class OrderSyncTests(TransactionTestCase):
+    """Committed for real, like customers.tests.SyncCommandTests."""
+    databases = "__all__"
+
+    def setUp(self):
+        with MultiDBRouter.bulk_mode():  # Only in default, sync has to copy them
+            customers = Customer.objects.bulk_create(
+                Customer(name=f"Customer {i}", email=f"c{i}@example.com") for i in range(3)
+            )
+            Order.objects.bulk_create(
+                Order(customer=customer, product=f"Product {i}", amount_cents=100 * i)
+                for customer in customers for i in range(2)
+            )
+
+    def sync(self, *args):
+        out = StringIO()
+        # Spy on the digest comparison to see which models each chunk upserts
+        with mock.patch.object(multidb.Command, "_changed_objs", wraps=multidb.Command._changed_objs) as changed:
+            call_command("multidb", "sync", *args, stdout=out)
+        upserted = [call.args[0] for call in changed.call_args_list]
+        return out.getvalue(), upserted
+
+    def assertSynced(self):
+        for alias in REPLICAS:
+            self.assertEqual(Customer.objects.using(alias).count(), 3, alias)
+            self.assertEqual(Order.objects.using(alias).count(), 6, alias)
+
+    def test_full_sync_in_dependency_order(self):
+        out, upserted = self.sync()
+        self.assertSynced()
+        self.assertEqual(out.count("Synced customers.Customer: 3 rows (0 unchanged)"), 2)
+        self.assertEqual(out.count("Synced orders.Order: 6 rows (0 unchanged)"), 2)
+        self.assertLess(out.index("Synced customers.Customer"), out.index("Synced orders.Order"))
+        # Customers are already synced when Orders run, their per-chunk FK upsert is skipped
+        self.assertEqual(upserted.count(Customer), len(REPLICAS))
+
+    def test_sync_orders_only_brings_their_customers(self):
+        out, upserted = self.sync("--models", "orders.Order")
+        self.assertSynced()
+        self.assertNotIn("Synced customers.Customer", out)
+        self.assertEqual(upserted.count(Customer), len(REPLICAS))  # Through the Orders' chunks
+
+    def test_cycle_falls_back_to_per_chunk_fk_upserts(self):
+        with mock.patch.object(multidb, "_dependency_order", side_effect=CycleError):
+            out, upserted = self.sync()
+        self.assertSynced()
+        # Without an order nothing counts as done, every Order chunk upserts its Customers too
+        self.assertEqual(upserted.count(Customer), 2 * len(REPLICAS))
+
+
+class DependencyOrderTests(SimpleTestCase):
+    def test_fk_targets_come_first(self):
+        self.assertEqual(multidb._dependency_order([Order, Customer]), [Customer, Order])
+
+    @isolate_apps("orders")
+    def test_self_reference_is_not_a_cycle(self):
+        class Category(models.Model):
+            parent = models.ForeignKey("self", models.CASCADE, null=True)
+
+        self.assertEqual(multidb._dependency_order([Category]), [Category])
+
+    @isolate_apps("orders")
+    def test_cycle_raises(self):
+        class Invoice(models.Model):
+            latest_payment = models.ForeignKey("Payment", models.SET_NULL, null=True, related_name="+")
+
+        class Payment(models.Model):
+            invoice = models.ForeignKey(Invoice, models.CASCADE)
+
+        with self.assertRaises(CycleError):
+            multidb._dependency_order([Invoice, Payment])
+
+
+class AmountCentsMigrationTests(TransactionTestCase):
+    """0003_amount_cents converts amount to integer cents and back, rehashing both ways."""
+    databases = {"default"}  # Reads use .using("default"), the router would spread them over the replicas
+
+    before = [("orders", "0002_content_hash")]
+    after = [("orders", "0003_amount_cents")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_round_trip(self):
+        old_apps = self.migrate(self.before)
+        customer = old_apps.get_model("customers", "Customer").objects.using("default").create(
+            name="Ada", email="ada@example.com"
+        )
+        pk = old_apps.get_model("orders", "Order").objects.using("default").create(
+            customer=customer, product="Laptop", amount=Decimal("12.34")
+        ).pk
+
+        new_apps = self.migrate(self.after)
+        order = new_apps.get_model("orders", "Order").objects.using("default").get(pk=pk)
+        self.assertEqual(order.amount_cents, 1234)
+        self.assertEqual(bytes(order.content_hash), content_digest(customer.pk, "Laptop", 1234))
+
+        old_apps = self.migrate(self.before)
+        order = old_apps.get_model("orders", "Order").objects.using("default").get(pk=pk)
+        self.assertEqual(order.amount, Decimal("12.34"))
+        self.assertEqual(bytes(order.content_hash), content_digest(customer.pk, "Laptop", "12.34"))